@@ -2,15 +2,30 @@ from __future__ import annotations
 
 import asyncio
 import ssl
-from asyncio import CancelledError, TimeoutError, create_task, gather, sleep, wait_for
+from asyncio import (
+    FIRST_COMPLETED,
+    CancelledError,
+    TimeoutError,
+    create_task,
+    gather,
+    sleep,
+    wait,
+    wait_for,
+)
 from contextlib import contextmanager, suppress
 from dataclasses import dataclass, field
-from itertools import count
 from logging import getLogger
 from random import shuffle
+from time import monotonic
 from typing import Optional, Protocol, Set
 
-from .connection import Connection, Request, Response, create_ssl_context
+from .connection import (
+    Connection,
+    Request,
+    Response,
+    _default_ssl_context,
+    create_ssl_context,
+)
 from .errors import Blocked, Closed, Timeout
 
 logger = getLogger(__package__)
@@ -57,7 +72,7 @@ class Pool:
         """Connect to `origin` and return a connection pool"""
         if size < 1:
             raise ValueError("Connection pool size must be strictly positive")
-        ssl_context = ssl or create_ssl_context()
+        ssl_context = ssl or _default_ssl_context()
         connections = set(
             await gather(
                 *(Connection.create(origin, ssl=ssl_context) for i in range(size))
@@ -72,7 +87,8 @@ class Pool:
     async def post(self, request: "Request") -> "Response":
         """Post the `request` on a connection in this pool, with retries"""
         with self.count_requests():
-            for delay in (10 ** i for i in count(-3, 0.5)):
+            started = monotonic()
+            while True:
                 if self.closing:
                     raise Closed(self.outcome)
 
@@ -84,17 +100,19 @@ class Pool:
                 if self.closing:
                     raise Closed(self.outcome)
 
-                if request.get_time_left_or_fail() < delay:
-                    raise Timeout("Request would time out awaiting retry")
-
+                # Escalate the backoff with time spent on this request, not
+                # with the attempt count: wait_unblocked returns early on
+                # every stream completion, so a per-attempt schedule would
+                # burn through in milliseconds and overshoot the deadline.
+                # True expiry is get_time_left_or_fail's job.
+                remaining = request.get_time_left_or_fail()
+                delay = min(max(monotonic() - started, 0.001), 1.0, remaining)
                 try:
                     self.retrying += 1
-                    await sleep(delay)
+                    await self.wait_unblocked(delay)
                 finally:
                     self.retrying -= 1
 
-            assert False, "unreachable"
-
     async def close(self):
         """Terminate the connection pool and free up the resources"""
         self.closing = True
@@ -208,6 +226,24 @@ class Pool:
                 await wait_for(self.maintenance_needed.wait(), timeout=1)
             self.maintenance_needed.clear()
 
+    async def wait_unblocked(self, timeout: float):
+        """Wait for an active connection to signal that it can take requests.
+
+        Connections wake us the moment a stream completes or the server
+        raises a limit, rather than us polling on a fixed backoff. Still
+        bounded by `timeout`: connection churn can invalidate the signal.
+        """
+        candidates = [c for c in self.active if not c.closing and not c.closed]
+        if not candidates:
+            await sleep(timeout)
+            return
+        waiters = [create_task(c.unblocked.wait()) for c in candidates]
+        try:
+            await wait(waiters, timeout=timeout, return_when=FIRST_COMPLETED)
+        finally:
+            for waiter in waiters:
+                waiter.cancel()
+
     async def add_one_connection(self):
         try:
             connection = await Connection.create(self.origin, ssl=self.ssl_context)
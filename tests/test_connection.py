@@ -2,7 +2,8 @@ import ssl
 
 import pytest
 
-from aapns.connection import Connection
+from aapns.connection import Connection, Response
+from aapns.errors import FormatError
 
 pytestmark = pytest.mark.asyncio
 
@@ -30,3 +31,21 @@ async def test_bad_context():
     context.options = 0
     with pytest.raises(ValueError):
         await Connection.create("https://localhost:1234", context)
+
+
+async def test_response_ok():
+    response = Response.new(200, "some-id", b"")
+    assert response.code == 200
+    assert response.apns_id == "some-id"
+    assert response.reason is None
+
+
+async def test_response_error():
+    response = Response.new(400, "some-id", bytearray(b'{"reason": "BadDeviceToken"}'))
+    assert response.code == 400
+    assert response.reason == "BadDeviceToken"
+
+
+async def test_response_not_json():
+    with pytest.raises(FormatError):
+        Response.new(500, None, b"<html>oops</html>")